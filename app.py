@@ -1,69 +1,60 @@
 import streamlit as st
-from PIL import Image
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import io
-import streamlit.components.v1 as components
+import csv
+from datetime import datetime
 import os
-import pandas as pd
+import re
+import string
+import numpy as np
 import math  # for NaN/finite checks
 
 # --- Image Paths ---
 LEKALINK_LOGO_PATH = os.path.join("assets", "LL_Stacked_Gradient.png")
+_HAS_LOGO = os.path.exists(LEKALINK_LOGO_PATH)
+
+
+@functools.lru_cache(maxsize=1)
+def _logo():
+    """Decodes the logo once per process; every quote reuses the same reader."""
+    # reportlab is imported lazily so app startup doesn't pay for it
+    from reportlab.lib.utils import ImageReader
+
+    img = ImageReader(LEKALINK_LOGO_PATH)
+    return img, img.getSize()
 
 # --- Pricing Configuration (Default values) ---
 DEFAULT_VM_RATE = 864.35
 DEFAULT_STORAGE_RATE_PER_TB = 870.40
 DEFAULT_BANDWIDTH_RATE_PER_MBPS = 7.50
 
-# Initialize rates with default values
-VM_RATE = DEFAULT_VM_RATE
-STORAGE_RATE_PER_TB = DEFAULT_STORAGE_RATE_PER_TB
-BANDWIDTH_RATE_PER_MBPS = DEFAULT_BANDWIDTH_RATE_PER_MBPS
-
 # --- Pricing Configuration (Dynamically loaded from CSV) ---
 PRICE_SHEET_PATH = os.path.join("assets", "Leka Link_Channel Partner_VDC Calculator.xlsx - VDC Calculation.csv")
 
-try:
-    # Check if assets directory exists
-    assets_dir = "assets"
-    if not os.path.exists(assets_dir):
-        st.error(f"Error: The '{assets_dir}' directory was not found. Please ensure your CSV file is inside a folder named '{assets_dir}' in the same directory as your app.py.")
-        raise FileNotFoundError(f"Directory '{assets_dir}' not found.")
-
-    # Check if the CSV file exists within the assets directory
-    if not os.path.exists(PRICE_SHEET_PATH):
-        st.error(f"Error: The price sheet CSV file was not found at '{PRICE_SHEET_PATH}'. Please ensure the file name is exactly 'Leka Link_Channel Partner_VDC Calculator.xlsx - VDC Calculation.csv' and it's inside the 'assets' folder.")
-        raise FileNotFoundError(f"File '{PRICE_SHEET_PATH}' not found.")
-
-    # If both exist, proceed with reading the CSV
-    price_df = pd.read_csv(
-        PRICE_SHEET_PATH,
-        header=4,
-        encoding='latin-1',
-        on_bad_lines='skip',
-        engine='python'
-    )
-    
-    # Strip whitespace from column names
-    price_df.columns = price_df.columns.str.strip()
-
-    # Convert 'Unit Monthly' column to numeric
-    price_df['Unit Monthly'] = pd.to_numeric(price_df['Unit Monthly'], errors='coerce')
-
-    # Debug: Print available descriptions to help identify correct text
-    print("DEBUG: Available descriptions in CSV:")
-    print(price_df['Description'].dropna().unique())
-    
-    # Only consider rows where Unit Monthly is a real number
-    valid = price_df['Unit Monthly'].notna() & price_df['Unit Monthly'].apply(lambda v: isinstance(v, (int, float)))
+# Keyword buckets for classifying price-sheet rows; one combined pattern,
+# compiled once at import and reused on every (re)load of the sheet.
+# match.lastindex says which bucket a row hits.
+_STORAGE, _BANDWIDTH, _VM = 1, 2, 3
+_RATE_RE = re.compile(
+    r'(storage|nvme|ssd|vstorage)'
+    r'|(bandwidth|internet|connectivity|mbps|network)'
+    r'|(virtual|data centre|vdc|vm|resource pool|allocation)',
+    re.IGNORECASE
+)
+
+@st.cache_resource(ttl=24 * 60 * 60, show_spinner=False)
+def load_rates(path):
+    """Loads pricing rates from the CSV once per process; Streamlit reruns hit the cache.
+
+    cache_resource (rather than cache_data) so the result is returned without
+    re-hashing/copying and, when the sheet is missing or malformed, the
+    st.error / traceback path runs once instead of on every rerun.
+    """
+    vm_rate = DEFAULT_VM_RATE
+    storage_rate_per_tb = DEFAULT_STORAGE_RATE_PER_TB
+    bandwidth_rate_per_mbps = DEFAULT_BANDWIDTH_RATE_PER_MBPS
 
     # --- Helper to coerce numeric rates & fallback to defaults ---
     def coerce_rate(val, default):
@@ -73,70 +64,123 @@ try:
         except Exception:
             return default
 
-    # More flexible matching for VM pricing
-    vm_keywords = ['Virtual', 'Data Centre', 'VDC', 'VM', 'Resource Pool', 'Allocation']
-    vm_mask = price_df['Description'].str.contains('|'.join(vm_keywords), na=False, case=False)
-    vm_row = price_df[vm_mask & valid]
-    if not vm_row.empty:
-        VM_RATE = coerce_rate(vm_row['Unit Monthly'].iloc[0], DEFAULT_VM_RATE)
-        print(f"DEBUG: Found VM rate: {VM_RATE} for description: '{vm_row['Description'].iloc[0]}'")
-    else:
-        VM_RATE = DEFAULT_VM_RATE
-        print("Warning: Could not find VM pricing in CSV. Using default VM rate.")
-
-    # More flexible matching for Storage pricing
-    storage_keywords = ['Storage', 'NVME', 'SSD', 'vStorage']
-    storage_mask = price_df['Description'].str.contains('|'.join(storage_keywords), na=False, case=False)
-    storage_row = price_df[storage_mask & valid]
-    if not storage_row.empty:
-        storage_price = coerce_rate(storage_row['Unit Monthly'].iloc[0], DEFAULT_STORAGE_RATE_PER_TB)
-        desc = str(storage_row['Description'].iloc[0])
-        # If description suggests GB and price is small, convert GB -> TB
-        if ('GB' in desc.upper()) and storage_price < 50:
-            STORAGE_RATE_PER_TB = storage_price * 1024
+    try:
+        # Check if assets directory exists
+        assets_dir = "assets"
+        if not os.path.exists(assets_dir):
+            st.error(f"Error: The '{assets_dir}' directory was not found. Please ensure your CSV file is inside a folder named '{assets_dir}' in the same directory as your app.py.")
+            raise FileNotFoundError(f"Directory '{assets_dir}' not found.")
+
+        # Check if the CSV file exists within the assets directory
+        if not os.path.exists(path):
+            st.error(f"Error: The price sheet CSV file was not found at '{path}'. Please ensure the file name is exactly 'Leka Link_Channel Partner_VDC Calculator.xlsx - VDC Calculation.csv' and it's inside the 'assets' folder.")
+            raise FileNotFoundError(f"File '{path}' not found.")
+
+        # The sheet is tiny and feeds three scalar lookups, so a plain
+        # csv.reader pass is cheaper than constructing a whole DataFrame
+        with open(path, encoding='latin-1', newline='') as f:
+            rows = list(csv.reader(f))
+
+        # Row 4 is the header row (mirrors the old read_csv header=4)
+        header = [cell.strip() for cell in rows[4]]
+        for col in ('Description', 'Unit Monthly'):
+            if col not in header:
+                raise KeyError(col)
+        desc_idx = header.index('Description')
+        monthly_idx = header.index('Unit Monthly')
+
+        # Debug: Print available descriptions to help identify correct text
+        print("DEBUG: Available descriptions in CSV:")
+        print([row[desc_idx] for row in rows[5:] if len(row) > desc_idx and row[desc_idx]])
+
+        # First hit with a real price per bucket; stop once all three are found
+        hits = {}
+        for row in rows[5:]:
+            if len(row) <= max(desc_idx, monthly_idx):
+                continue  # short/ragged row, mirrors on_bad_lines='skip'
+            try:
+                price = float(row[monthly_idx])
+            except ValueError:
+                continue
+            if not math.isfinite(price):
+                continue
+            m = _RATE_RE.search(row[desc_idx])
+            if m and m.lastindex not in hits:
+                hits[m.lastindex] = (row[desc_idx], price)
+                if len(hits) == 3:
+                    break
+
+        if _VM in hits:
+            desc, price = hits[_VM]
+            vm_rate = coerce_rate(price, DEFAULT_VM_RATE)
+            print(f"DEBUG: Found VM rate: {vm_rate} for description: '{desc}'")
         else:
-            STORAGE_RATE_PER_TB = storage_price
-        STORAGE_RATE_PER_TB = coerce_rate(STORAGE_RATE_PER_TB, DEFAULT_STORAGE_RATE_PER_TB)
-        print(f"DEBUG: Found Storage rate: {STORAGE_RATE_PER_TB} per TB for description: '{storage_row['Description'].iloc[0]}'")
-    else:
-        STORAGE_RATE_PER_TB = DEFAULT_STORAGE_RATE_PER_TB
-        print("Warning: Could not find Storage pricing in CSV. Using default Storage rate.")
-
-    # More flexible matching for Bandwidth/Connectivity
-    bandwidth_keywords = ['Bandwidth', 'Internet', 'Connectivity', 'Mbps', 'Network']
-    bandwidth_mask = price_df['Description'].str.contains('|'.join(bandwidth_keywords), na=False, case=False)
-    bandwidth_row = price_df[bandwidth_mask & valid]
-    if not bandwidth_row.empty:
-        BANDWIDTH_RATE_PER_MBPS = coerce_rate(bandwidth_row['Unit Monthly'].iloc[0], DEFAULT_BANDWIDTH_RATE_PER_MBPS)
-        print(f"DEBUG: Found Bandwidth rate: {BANDWIDTH_RATE_PER_MBPS} per Mbps for description: '{bandwidth_row['Description'].iloc[0]}'")
-    else:
-        BANDWIDTH_RATE_PER_MBPS = DEFAULT_BANDWIDTH_RATE_PER_MBPS
-        print("Warning: Could not find Bandwidth pricing in CSV. Using default Bandwidth rate.")
-
-    # Final safety (guarantee no NaNs)
-    VM_RATE = coerce_rate(VM_RATE, DEFAULT_VM_RATE)
-    STORAGE_RATE_PER_TB = coerce_rate(STORAGE_RATE_PER_TB, DEFAULT_STORAGE_RATE_PER_TB)
-    BANDWIDTH_RATE_PER_MBPS = coerce_rate(BANDWIDTH_RATE_PER_MBPS, DEFAULT_BANDWIDTH_RATE_PER_MBPS)
-
-    print(f"DEBUG: Final rates - VM: {VM_RATE}, Storage: {STORAGE_RATE_PER_TB}, Bandwidth: {BANDWIDTH_RATE_PER_MBPS}")
-
-except FileNotFoundError as e:
-    print(f"Caught FileNotFoundError: {e}. Using default pricing rates.")
-except KeyError as e:
-    st.error(f"Error reading column from price sheet: {e}. Ensure 'Description' and 'Unit Monthly' columns exist and are correctly formatted. Using default pricing rates.")
-except Exception as e:
-    st.error(f"An unexpected error occurred while loading prices from CSV: {e}. Using default pricing rates.")
-    print(f"DEBUG: Exception details: {e}")
-    import traceback
-    traceback.print_exc()
+            vm_rate = DEFAULT_VM_RATE
+            print("Warning: Could not find VM pricing in CSV. Using default VM rate.")
+
+        if _STORAGE in hits:
+            desc, price = hits[_STORAGE]
+            storage_price = coerce_rate(price, DEFAULT_STORAGE_RATE_PER_TB)
+            # If description suggests GB and price is small, convert GB -> TB
+            if ('GB' in desc.upper()) and storage_price < 50:
+                storage_rate_per_tb = storage_price * 1024
+            else:
+                storage_rate_per_tb = storage_price
+            storage_rate_per_tb = coerce_rate(storage_rate_per_tb, DEFAULT_STORAGE_RATE_PER_TB)
+            print(f"DEBUG: Found Storage rate: {storage_rate_per_tb} per TB for description: '{desc}'")
+        else:
+            storage_rate_per_tb = DEFAULT_STORAGE_RATE_PER_TB
+            print("Warning: Could not find Storage pricing in CSV. Using default Storage rate.")
+
+        if _BANDWIDTH in hits:
+            desc, price = hits[_BANDWIDTH]
+            bandwidth_rate_per_mbps = coerce_rate(price, DEFAULT_BANDWIDTH_RATE_PER_MBPS)
+            print(f"DEBUG: Found Bandwidth rate: {bandwidth_rate_per_mbps} per Mbps for description: '{desc}'")
+        else:
+            bandwidth_rate_per_mbps = DEFAULT_BANDWIDTH_RATE_PER_MBPS
+            print("Warning: Could not find Bandwidth pricing in CSV. Using default Bandwidth rate.")
+
+        # Final safety (guarantee no NaNs)
+        vm_rate = coerce_rate(vm_rate, DEFAULT_VM_RATE)
+        storage_rate_per_tb = coerce_rate(storage_rate_per_tb, DEFAULT_STORAGE_RATE_PER_TB)
+        bandwidth_rate_per_mbps = coerce_rate(bandwidth_rate_per_mbps, DEFAULT_BANDWIDTH_RATE_PER_MBPS)
+
+        print(f"DEBUG: Final rates - VM: {vm_rate}, Storage: {storage_rate_per_tb}, Bandwidth: {bandwidth_rate_per_mbps}")
+
+    except FileNotFoundError as e:
+        print(f"Caught FileNotFoundError: {e}. Using default pricing rates.")
+    except KeyError as e:
+        st.error(f"Error reading column from price sheet: {e}. Ensure 'Description' and 'Unit Monthly' columns exist and are correctly formatted. Using default pricing rates.")
+    except Exception as e:
+        st.error(f"An unexpected error occurred while loading prices from CSV: {e}. Using default pricing rates.")
+        print(f"DEBUG: Exception details: {e}")
+        import traceback
+        traceback.print_exc()
+
+    return vm_rate, storage_rate_per_tb, bandwidth_rate_per_mbps
+
+VM_RATE, STORAGE_RATE_PER_TB, BANDWIDTH_RATE_PER_MBPS = load_rates(PRICE_SHEET_PATH)
+
+@st.cache_data(show_spinner=False)
+def compute_savings(vms, storage, bandwidth, current_cost, vm_rate, storage_rate_per_tb, bandwidth_rate_per_mbps):
+    """Computes the LekaLink estimate and savings, cached per input combination.
+
+    The rates are arguments (not module globals) so they participate in the
+    cache key; when load_rates' TTL expires and the sheet yields new rates,
+    previously-seen inputs recompute instead of returning stale totals.
+    """
+    rates = np.array([vm_rate, storage_rate_per_tb, bandwidth_rate_per_mbps], dtype=np.float64)
+    lekalink_cost = float(rates @ np.array([vms, storage, bandwidth], dtype=np.float64))
+    monthly_savings = current_cost - lekalink_cost
+    percentage_savings = (monthly_savings / current_cost * 100) if current_cost > 0 else 0  # avoid NaN
+    return lekalink_cost, monthly_savings, percentage_savings
 
 # --- Custom CSS for Branding ---
 CUSTOM_CSS = """
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&display=swap');
-
-/* Apply font family globally */
+/* Apply font family globally; Inter is used if the browser has it, with
+   system fonts as fallback so rendering never blocks on a font download */
 html, body, [class*="st-"] {
-    font-family: 'Inter', sans-serif;
+    font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
 }
 
 /* Force all h1, h2, h3, p, and label elements to the desired purple color */
@@ -235,198 +279,279 @@ footer {visibility: hidden;}
 header {visibility: hidden;}
 """
 
-# Inject custom CSS
-components.html(f"<style>{CUSTOM_CSS}</style>", height=0, width=0)
+# Inject custom CSS inline (no iframe); re-emitted each rerun because
+# Streamlit drops elements that are not part of the current script run
+st.markdown(f"<style>{CUSTOM_CSS}</style>", unsafe_allow_html=True)
 
 # --- Helper Functions ---
-def create_pdf(data):
-    """Generates a PDF quote from the calculated data."""
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
 
-    # Define purple color for headings
-    PURPLE_RGB = (0.3176, 0.0706, 0.5059)  # RGB for #511281
+# Define purple color for headings
+PURPLE_RGB = (0.3176, 0.0706, 0.5059)  # RGB for #511281
+
+# Gap (in inches) between each PDF section anchor and the previous one;
+# resolved to absolute y coordinates once in _pdf_layout. Lines within a
+# section are advanced by the text object's leading, so only section
+# start positions are needed here.
+_PDF_SECTION_SPEC = (
+    ('title', 0.0),
+    ('client', 0.5),
+    ('current', 1.55),
+    ('leka', 0.8),
+    ('savings', 1.55),
+    ('next', 1.05),
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _pdf_layout():
+    """Computes the logo box and absolute y position of every PDF line once."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
 
-    # --- Add LekaLink Logo to PDF (Top Center) ---
-    y_position_logo = height - 0.5 * inch  # default so it's always defined
-    try:
-        if os.path.exists(LEKALINK_LOGO_PATH):
-            logo = ImageReader(LEKALINK_LOGO_PATH)
-            img_width, img_height = logo.getSize()
-            
-            # Desired width for the logo on PDF
+    width, height = letter
+    logo_box = None
+    if _HAS_LOGO:
+        try:
+            _, (img_width, img_height) = _logo()
+            # Desired width for the logo on PDF, centered at the top
             logo_display_width = 1.5 * inch
             logo_display_height = logo_display_width * (img_height / img_width)
+            logo_box = (
+                (width - logo_display_width) / 2,
+                height - logo_display_height - 0.5 * inch,
+                logo_display_width,
+                logo_display_height,
+            )
+            y = logo_box[1] - 0.5 * inch
+        except Exception as e:
+            st.error(f"Error loading LekaLink logo for PDF: {e}")
+            y = height - inch
+    else:
+        y = height - 1.5 * inch
 
-            # Calculate x position for centering
-            x_position_logo = (width - logo_display_width) / 2
-            # Position at the top with some margin
-            y_position_logo = height - logo_display_height - 0.5 * inch
-            c.drawImage(logo, x_position_logo, y_position_logo, width=logo_display_width, height=logo_display_height)
-        else:
-            st.warning(f"LekaLink logo not found at {LEKALINK_LOGO_PATH}. Skipping logo in PDF.")
-    except Exception as e:
-        st.error(f"Error loading LekaLink logo for PDF: {e}")
+    layout = {}
+    for key, gap in _PDF_SECTION_SPEC:
+        y -= gap * inch
+        layout[key] = y
+    return layout, logo_box
+
+
+def create_pdf(data):
+    """Generates a PDF quote from the calculated data."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
 
-    # Adjust starting y_position for text based on logo presence
-    y_position = height - 1.5 * inch if not os.path.exists(LEKALINK_LOGO_PATH) else y_position_logo - 0.5 * inch
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    layout, logo_box = _pdf_layout()
+
+    # --- Add LekaLink Logo to PDF (Top Center) ---
+    if logo_box is not None:
+        logo_x, logo_y, logo_w, logo_h = logo_box
+        c.drawImage(_logo()[0], logo_x, logo_y, width=logo_w, height=logo_h)
+    elif not _HAS_LOGO:
+        st.warning(f"LekaLink logo not found at {LEKALINK_LOGO_PATH}. Skipping logo in PDF.")
 
     # Title
     c.setFont('Helvetica-Bold', 24)
     c.setFillColorRGB(*PURPLE_RGB)
-    c.drawString(inch, y_position, "LekaLink Cloud Cost Quote")
-    y_position -= 0.5 * inch
+    c.drawString(inch, layout['title'], "LekaLink Cloud Cost Quote")
+
+    # Each section is one text object so its lines go out as a single
+    # BT...ET block instead of a drawString call per line
 
     # Company and Contact Info
-    c.setFillColorRGB(*PURPLE_RGB)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(inch, y_position, "Client Information:")
-    y_position -= 0.3 * inch
-    c.setFillColorRGB(0, 0, 0)
-    c.setFont('Helvetica', 12)
-    c.drawString(inch, y_position, f"Company: {data['company_name']}")
-    y_position -= 0.25 * inch
-    c.drawString(inch, y_position, f"Contact: {data['contact_name']} ({data['job_title']})")
-    y_position -= 0.25 * inch
-    c.drawString(inch, y_position, f"Email: {data['email']}")
-    y_position -= 0.25 * inch
-    c.drawString(inch, y_position, f"Phone: {data['phone']}")
-
-    y_position -= 0.5 * inch
+    t = c.beginText(inch, layout['client'])
+    t.setFont('Helvetica-Bold', 14, leading=0.3 * inch)
+    t.setFillColorRGB(*PURPLE_RGB)
+    t.textLine("Client Information:")
+    t.setFont('Helvetica', 12, leading=0.25 * inch)
+    t.setFillColorRGB(0, 0, 0)
+    t.textLine(f"Company: {data['company_name']}")
+    t.textLine(f"Contact: {data['contact_name']} ({data['job_title']})")
+    t.textLine(f"Email: {data['email']}")
+    t.textLine(f"Phone: {data['phone']}")
+    c.drawText(t)
 
     # Current Costs
-    c.setFillColorRGB(*PURPLE_RGB)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(inch, y_position, "Current Cloud Costs:")
-    y_position -= 0.3 * inch
-    c.setFillColorRGB(0, 0, 0)
-    c.setFont('Helvetica', 12)
-    c.drawString(inch, y_position, f"Monthly Cost: R{data['current_cost']:.2f}")
-
-    y_position -= 0.5 * inch
-
-    # LekaLink Estimated Costs
-    c.setFillColorRGB(*PURPLE_RGB)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(inch, y_position, "LekaLink Estimated Costs:")
-    y_position -= 0.3 * inch
-    c.setFillColorRGB(0, 0, 0)
-    c.setFont('Helvetica', 12)
-    
-    # Display estimated totals per item
-    c.drawString(inch, y_position, f"Virtual Machines: R{data['vms'] * data['vm_rate']:.2f}")
-    y_position -= 0.25 * inch
-    c.drawString(inch, y_position, f"Storage: R{data['storage'] * data['storage_rate_per_tb']:.2f}")
-    y_position -= 0.25 * inch
-    c.drawString(inch, y_position, f"Bandwidth: R{data['bandwidth'] * data['bandwidth_rate_per_mbps']:.2f}")
-    y_position -= 0.25 * inch
-    c.setFont('Helvetica-Bold', 12)
-    c.drawString(inch, y_position, f"Total LekaLink Estimated Cost: R{data['lekalink_cost']:.2f}")
-
-    y_position -= 0.5 * inch
+    t = c.beginText(inch, layout['current'])
+    t.setFont('Helvetica-Bold', 14, leading=0.3 * inch)
+    t.setFillColorRGB(*PURPLE_RGB)
+    t.textLine("Current Cloud Costs:")
+    t.setFont('Helvetica', 12, leading=0.25 * inch)
+    t.setFillColorRGB(0, 0, 0)
+    t.textLine(f"Monthly Cost: R{data['current_cost']:.2f}")
+    c.drawText(t)
+
+    # LekaLink Estimated Costs (estimated totals per item)
+    t = c.beginText(inch, layout['leka'])
+    t.setFont('Helvetica-Bold', 14, leading=0.3 * inch)
+    t.setFillColorRGB(*PURPLE_RGB)
+    t.textLine("LekaLink Estimated Costs:")
+    t.setFont('Helvetica', 12, leading=0.25 * inch)
+    t.setFillColorRGB(0, 0, 0)
+    t.textLine(f"Virtual Machines: R{data['vms'] * data['vm_rate']:.2f}")
+    t.textLine(f"Storage: R{data['storage'] * data['storage_rate_per_tb']:.2f}")
+    t.textLine(f"Bandwidth: R{data['bandwidth'] * data['bandwidth_rate_per_mbps']:.2f}")
+    t.setFont('Helvetica-Bold', 12, leading=0.25 * inch)
+    t.textLine(f"Total LekaLink Estimated Cost: R{data['lekalink_cost']:.2f}")
+    c.drawText(t)
 
     # Savings
-    c.setFillColorRGB(*PURPLE_RGB)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(inch, y_position, "Potential Savings:")
-    y_position -= 0.3 * inch
-    c.setFillColorRGB(0, 0, 0)
-    c.setFont('Helvetica', 12)
+    t = c.beginText(inch, layout['savings'])
+    t.setFont('Helvetica-Bold', 14, leading=0.3 * inch)
+    t.setFillColorRGB(*PURPLE_RGB)
+    t.textLine("Potential Savings:")
+    t.setFont('Helvetica', 12, leading=0.25 * inch)
     if data['monthly_savings'] >= 0:
-        c.setFillColorRGB(0.08, 0.64, 0.29)  # LekaLink Green
-        c.drawString(inch, y_position, f"Monthly Savings: R{data['monthly_savings']:.2f}")
-        y_position -= 0.25 * inch
-        c.drawString(inch, y_position, f"Percentage Savings: {data['percentage_savings']:.2f}%")
+        t.setFillColorRGB(0.08, 0.64, 0.29)  # LekaLink Green
+        t.textLine(f"Monthly Savings: R{data['monthly_savings']:.2f}")
+        t.textLine(f"Percentage Savings: {data['percentage_savings']:.2f}%")
     else:
-        c.setFillColorRGB(0.91, 0.30, 0.24)  # Red
-        c.drawString(inch, y_position, f"Monthly Increase: R{-data['monthly_savings']:.2f}")
-        y_position -= 0.25 * inch
-        c.drawString(inch, y_position, f"Percentage Increase: {-data['percentage_savings']:.2f}%")
-
-    y_position -= 0.5 * inch
-
-    # Next Steps
-    c.setFillColorRGB(*PURPLE_RGB)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(inch, y_position, "Next Steps:")
-    y_position -= 0.3 * inch
-    c.setFillColorRGB(0, 0, 0)
-    c.setFont('Helvetica', 12)
-    c.drawString(inch, y_position, "Our sales team will contact you within 24 hours to discuss your requirements.")
-    y_position -= 0.3 * inch
-
-    # Contact Information
-    c.drawString(inch, y_position, "LekaLink (Pty) Ltd")
-    y_position -= 0.2 * inch
-    c.drawString(inch, y_position, "Phone: +27 010 822 7259")
-    y_position -= 0.2 * inch
-    c.drawString(inch, y_position, "Email: sales@lekalink.co.za")
-    y_position -= 0.2 * inch
-    c.drawString(inch, y_position, "Website: www.lekalink.co.za")
-    y_position -= 0.2 * inch
-    c.drawString(inch, y_position, "Address: 89 Bute Rd, Sandown, Sandton, Gauteng, 2196")
+        t.setFillColorRGB(0.91, 0.30, 0.24)  # Red
+        t.textLine(f"Monthly Increase: R{-data['monthly_savings']:.2f}")
+        t.textLine(f"Percentage Increase: {-data['percentage_savings']:.2f}%")
+    c.drawText(t)
+
+    # Next Steps and Contact Information
+    t = c.beginText(inch, layout['next'])
+    t.setFont('Helvetica-Bold', 14, leading=0.3 * inch)
+    t.setFillColorRGB(*PURPLE_RGB)
+    t.textLine("Next Steps:")
+    t.setFont('Helvetica', 12, leading=0.3 * inch)
+    t.setFillColorRGB(0, 0, 0)
+    t.textLine("Our sales team will contact you within 24 hours to discuss your requirements.")
+    t.setLeading(0.2 * inch)
+    t.textLine("LekaLink (Pty) Ltd")
+    t.textLine("Phone: +27 010 822 7259")
+    t.textLine("Email: sales@lekalink.co.za")
+    t.textLine("Website: www.lekalink.co.za")
+    t.textLine("Address: 89 Bute Rd, Sandown, Sandton, Gauteng, 2196")
+    c.drawText(t)
 
     c.showPage()
     c.save()
+    # Hand back the buffer itself rather than copying it out with getvalue();
+    # both the download button and the email attachment read from it
     buffer.seek(0)
-    return buffer.getvalue()
+    return buffer
 
-def send_email_to_sales(quote_data, pdf_data):
-    """Send quote details and PDF to sales team via Gmail SMTP"""
-    
-    # Gmail Configuration with provided credentials
-    GMAIL_EMAIL = st.secrets["gmail"]["email"]
-    GMAIL_PASSWORD = st.secrets["gmail"]["app_password"]
-    SMTP_SERVER = "smtp.gmail.com"
-    SMTP_PORT = 587
-    SALES_EMAIL = "sales@lekalink.co.za"
-    CC_EMAIL = "sarah@lekalink.co.za"   # CC Sarah
-    
-    try:
-        # Create sales notification email with PDF attachment
-        msg = MIMEMultipart()
-        msg['From'] = GMAIL_EMAIL
-        msg['To'] = SALES_EMAIL
-        msg['Cc'] = CC_EMAIL            # add CC header
-        msg['Subject'] = f"New Calculator Lead: {quote_data['company_name']}"
-        
-        # Email body with all lead details
-        email_body = f"""NEW CALCULATOR LEAD GENERATED
+# --- Email Configuration ---
+SMTP_SERVER = "smtp.gmail.com"
+SMTP_PORT = 587
+SMTP_TIMEOUT = 30  # seconds; a dead SMTP server must not hang the app
+SALES_EMAIL = "sales@lekalink.co.za"
+CC_EMAIL = "sarah@lekalink.co.za"   # CC Sarah
+
+
+# Static layout of the sales notification; only the dynamic fields are
+# substituted per send
+_EMAIL_BODY_TEMPLATE = string.Template("""NEW CALCULATOR LEAD GENERATED
 =============================
 
 COMPANY INFORMATION:
-Company: {quote_data['company_name']}
-Contact: {quote_data['contact_name']}
-Job Title: {quote_data['job_title']}
-Email: {quote_data['email']}
-Phone: {quote_data['phone']}
+Company: $company_name
+Contact: $contact_name
+Job Title: $job_title
+Email: $email
+Phone: $phone
 
 CURRENT INFRASTRUCTURE:
-Virtual Machines: {quote_data['vms']}
-Storage: {quote_data['storage']} TB
-Bandwidth: {quote_data['bandwidth']} Mbps
-Current Monthly Cost: R{quote_data['current_cost']:,.2f}
+Virtual Machines: $vms
+Storage: $storage TB
+Bandwidth: $bandwidth Mbps
+Current Monthly Cost: R$current_cost
 
 LEKALINK ESTIMATE:
-LekaLink Monthly Cost: R{quote_data['lekalink_cost']:,.2f}
-Monthly Savings: R{quote_data['monthly_savings']:,.2f}
-Percentage Savings: {quote_data['percentage_savings']:.1f}%
+LekaLink Monthly Cost: R$lekalink_cost
+Monthly Savings: R$monthly_savings
+Percentage Savings: $percentage_savings%
 
 FOLLOW-UP ACTION REQUIRED:
-Contact {quote_data['contact_name']} at {quote_data['email']} within 24 hours.
+Contact $contact_name at $email within 24 hours.
 
-Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated: $generated_at
 
 The customer's quote PDF is attached to this email.
-"""
+""")
+
+
+def _quit_smtp(server):
+    """Closes an SMTP connection, ignoring already-dead sockets."""
+    try:
+        server.quit()
+    except Exception:
+        pass
+
+
+def _connect_smtp():
+    """Opens, secures, and authenticates a fresh Gmail SMTP connection."""
+    import smtplib
+
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    server.starttls()
+    server.login(st.secrets["gmail"]["email"], st.secrets["gmail"]["app_password"])
+    return server
+
+
+def _get_smtp(future=None):
+    """Returns the session's persistent SMTP connection, connecting on first use.
+
+    Keeping one logged-in connection in st.session_state avoids repeating the
+    TLS handshake + auth round trip for every quote sent in a session. When a
+    prewarm future is supplied, its connection is adopted instead of opening
+    a new one here.
+    """
+    if 'smtp' not in st.session_state:
+        server = future.result() if future is not None else _connect_smtp()
+        atexit.register(_quit_smtp, server)
+        st.session_state['smtp'] = server
+    return st.session_state['smtp']
+
+
+def send_email_to_sales(quote_data, pdf_buffer, smtp_future=None):
+    """Send quote details and PDF to sales team via Gmail SMTP"""
+    import smtplib
+    from email import encoders
+    from email.mime.base import MIMEBase
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    # Gmail Configuration with provided credentials
+    GMAIL_EMAIL = st.secrets["gmail"]["email"]
+
+    try:
+        # Create sales notification email with PDF attachment
+        msg = MIMEMultipart()
+        msg['From'] = GMAIL_EMAIL
+        msg['To'] = SALES_EMAIL
+        msg['Cc'] = CC_EMAIL            # add CC header
+        msg['Subject'] = f"New Calculator Lead: {quote_data['company_name']}"
         
+        # Email body with all lead details
+        email_body = _EMAIL_BODY_TEMPLATE.substitute(
+            company_name=quote_data['company_name'],
+            contact_name=quote_data['contact_name'],
+            job_title=quote_data['job_title'],
+            email=quote_data['email'],
+            phone=quote_data['phone'],
+            vms=quote_data['vms'],
+            storage=quote_data['storage'],
+            bandwidth=quote_data['bandwidth'],
+            current_cost=f"{quote_data['current_cost']:,.2f}",
+            lekalink_cost=f"{quote_data['lekalink_cost']:,.2f}",
+            monthly_savings=f"{quote_data['monthly_savings']:,.2f}",
+            percentage_savings=f"{quote_data['percentage_savings']:.1f}",
+            generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        )
+
         msg.attach(MIMEText(email_body, 'plain'))
         
         # Attach PDF to email
-        if pdf_data:
+        if pdf_buffer is not None and pdf_buffer.getbuffer().nbytes:
             part = MIMEBase('application', 'octet-stream')
-            part.set_payload(pdf_data)
+            part.set_payload(pdf_buffer.getvalue())
             encoders.encode_base64(part)
             part.add_header(
                 'Content-Disposition', 
@@ -434,13 +559,15 @@ The customer's quote PDF is attached to this email.
             )
             msg.attach(part)
         
-        # Send the email to both To and CC
+        # Send the email to both To and CC over the persistent connection
         recipients = [SALES_EMAIL, CC_EMAIL]
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(GMAIL_EMAIL, GMAIL_PASSWORD)
-            server.sendmail(GMAIL_EMAIL, recipients, msg.as_string())
-            
+        try:
+            _get_smtp(smtp_future).sendmail(GMAIL_EMAIL, recipients, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # Stale connection (server-side idle timeout); reconnect and retry once
+            st.session_state.pop('smtp', None)
+            _get_smtp().sendmail(GMAIL_EMAIL, recipients, msg.as_string())
+
         return True
         
     except Exception as e:
@@ -497,21 +624,30 @@ if st.button("Save me Money"):
     # Perform validation before calculations
     if validate_inputs(company_name, contact_name, job_title, email, phone):
         # --- Calculation Logic ---
-        lekalink_cost = (vms * VM_RATE) + (storage * STORAGE_RATE_PER_TB) + (bandwidth * BANDWIDTH_RATE_PER_MBPS)
-        monthly_savings = current_cost - lekalink_cost
-        percentage_savings = (monthly_savings / current_cost * 100) if current_cost > 0 else 0  # avoid NaN
-
-        st.markdown('<div class="results-card">', unsafe_allow_html=True)
-        st.write("### Your Estimated Savings with LekaLink")
-        st.write(f"**LekaLink Estimated Monthly Cost:** R{lekalink_cost:,.2f}")
+        lekalink_cost, monthly_savings, percentage_savings = compute_savings(
+            vms, storage, bandwidth, current_cost,
+            VM_RATE, STORAGE_RATE_PER_TB, BANDWIDTH_RATE_PER_MBPS
+        )
 
+        # Render the whole results card as one element so each result is a
+        # single protocol message / DOM update rather than five separate calls
         if monthly_savings >= 0:
-            st.markdown(f'<p class="savings-positive">**Monthly Savings:** R{monthly_savings:,.2f}</p>', unsafe_allow_html=True)
-            st.markdown(f'<p class="savings-positive">**Percentage Savings:** {percentage_savings:.2f}%</p>', unsafe_allow_html=True)
+            savings_class = "savings-positive"
+            amount_line = f"<b>Monthly Savings:</b> R{monthly_savings:,.2f}"
+            percent_line = f"<b>Percentage Savings:</b> {percentage_savings:.2f}%"
         else:
-            st.markdown(f'<p class="savings-negative">**Monthly Increase:** R{-monthly_savings:,.2f}</p>', unsafe_allow_html=True)
-            st.markdown(f'<p class="savings-negative">**Percentage Increase:** {-percentage_savings:.2f}%</p>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+            savings_class = "savings-negative"
+            amount_line = f"<b>Monthly Increase:</b> R{-monthly_savings:,.2f}"
+            percent_line = f"<b>Percentage Increase:</b> {-percentage_savings:.2f}%"
+        st.markdown(
+            f'<div class="results-card">'
+            f'<h3>Your Estimated Savings with LekaLink</h3>'
+            f'<p><b>LekaLink Estimated Monthly Cost:</b> R{lekalink_cost:,.2f}</p>'
+            f'<p class="{savings_class}">{amount_line}</p>'
+            f'<p class="{savings_class}">{percent_line}</p>'
+            f'</div>',
+            unsafe_allow_html=True,
+        )
 
         # Prepare data for PDF
         quote_data = {
@@ -532,8 +668,17 @@ if st.button("Save me Money"):
             "bandwidth_rate_per_mbps": BANDWIDTH_RATE_PER_MBPS
         }
 
-        # Generate PDF
+        # Generate PDF; when the session has no SMTP connection yet, start the
+        # TLS handshake in a worker thread so the network round trip overlaps
+        # the CPU-bound ReportLab render instead of following it. The executor
+        # is shut down without waiting so a slow SMTP server cannot delay the
+        # download button; send_email_to_sales resolves the future later.
+        smtp_future = None
+        executor = ThreadPoolExecutor(max_workers=1)
+        if 'smtp' not in st.session_state:
+            smtp_future = executor.submit(_connect_smtp)
         pdf_output = create_pdf(quote_data)
+        executor.shutdown(wait=False)
 
         # Provide PDF download button
         st.download_button(
@@ -544,7 +689,7 @@ if st.button("Save me Money"):
         )
 
         # Send email to sales team with PDF attachment
-        if send_email_to_sales(quote_data, pdf_output):
+        if send_email_to_sales(quote_data, pdf_output, smtp_future):
             st.success("Quote generated and sent to LekaLink Sales (cc Sarah) with PDF attachment! We'll contact you within 24 hours.")
         else:
             st.info("Quote generated successfully! Please download your quote above.")